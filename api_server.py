@@ -5,28 +5,52 @@ Compatible with GLM-TTS API interface
 """
 
 import argparse
+import asyncio
 import base64
-import json
+import functools
+import itertools
 import logging
 import os
+import struct
 import sys
 import tempfile
-import time
-import traceback
 from pathlib import Path
 from typing import Optional, List
 
+import aiofiles
+import numpy as np
+import orjson
 import uvicorn
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
+from fastapi import BackgroundTasks, FastAPI, File, Form, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 # Add project root to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from indextts.api_handler import IndexTTSAPIHandler, audio_to_base64, save_uploaded_audio
+from indextts.api_handler import IndexTTSAPIHandler, ParameterConverter
+
+
+def _orjson_default(o):
+    """Coerce types orjson can't serialize natively (Path, numpy scalars)"""
+    if isinstance(o, Path):
+        return str(o)
+    if hasattr(o, 'item'):
+        return o.item()
+    raise TypeError
+
+
+class APIJSONResponse(ORJSONResponse):
+    """ORJSONResponse that handles numpy arrays/scalars and Path objects in C"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
 
 
 # Configure logging
@@ -63,7 +87,7 @@ class TTSEmotionRequest(BaseModel):
 
 
 class TTSResponse(BaseModel):
-    """TTS response model"""
+    """TTS response model (kept for API documentation)"""
     success: bool
     message: str
     audio_base64: Optional[str] = None
@@ -85,6 +109,7 @@ class HealthResponse(BaseModel):
 
 # Initialize FastAPI app
 app = FastAPI(
+    default_response_class=APIJSONResponse,
     title="IndexTTS API",
     description="IndexTTS2 Text-to-Speech API Service",
     version="2.0.0",
@@ -92,26 +117,131 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# CORS must be registered at module scope so it applies when the app is
+# imported by a worker process or run under --reload. Credentials are
+# disallowed: the spec forbids allow_credentials with wildcard origins.
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Temp dir resolved once; uploads and outputs go to tmpfs when available
+# so the round-trip to the model never touches block I/O
+_TMPDIR = ("/dev/shm" + os.sep if os.path.isdir("/dev/shm")
+           else tempfile.gettempdir() + os.sep)
+
+# Monotonic sequence for temp filenames; combined with the pid this is
+# unique across concurrent requests and across workers
+_seq = itertools.count()
+
+# Config paths (env vars so worker subprocesses see the same settings)
+CONFIG_PATH = os.environ.get("INDEXTTS_API_CONFIG", "configs/api_config.yaml")
+PROMPT_CACHE_PATH = os.environ.get("INDEXTTS_PROMPT_CACHE", "configs/prompt_cache.json")
+
 # Global handler instance
 handler: Optional[IndexTTSAPIHandler] = None
 
+# Hard cap on simultaneous GPU inferences; concurrent forwards past this
+# just thrash the CUDA context. The handler's length-based semaphores
+# still apply underneath this gate.
+_GPU_SEM = asyncio.Semaphore(int(os.getenv("TTS_GPU_SLOTS", "2")))
 
-# Middleware for logging
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    start_time = time.time()
-    
-    # Log request
-    logger.info(f"Request: {request.method} {request.url.path}")
-    
-    response = await call_next(request)
-    
-    # Log response
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} (took {process_time:.2f}s)")
-    
-    return response
+# Rate of the PCM produced by the decoder (sampling_rate in
+# IndexTTS2.infer_generator); the streamed WAV header must match it
+STREAM_SAMPLE_RATE = 22050
+
+# Preflight limits: reject oversize requests before any GPU work.
+# Long texts cost quadratic attention time and can OOM the device.
+MAX_TEXT_CHARS = int(os.getenv("TTS_MAX_TEXT_CHARS", "5000"))
+MAX_UPLOAD_BYTES = int(os.getenv("TTS_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+
+
+@functools.lru_cache(maxsize=1024)
+def _convert_glm_params(sample_method: str = "ras", sampling: Optional[int] = None,
+                        beam_size: int = 1) -> dict:
+    """Memoized GLM→IndexTTS2 parameter conversion (small key space, reused read-only)"""
+    params = {"sample_method": sample_method, "beam_size": beam_size}
+    if sampling is not None:
+        params["sampling"] = sampling
+    return ParameterConverter.convert_glm_to_indextts(params)
+
+
+def _static_error(payload: dict):
+    """Build an error-response factory with the body rendered once
+
+    The JSON is encoded at import time; each call wraps the shared bytes
+    in a fresh Response. Responses must not be shared across requests:
+    FastAPI attaches the per-request BackgroundTasks to a returned
+    response whose .background is None, so a singleton would pin (and
+    re-run) the first request's task list forever.
+    """
+    body = orjson.dumps(payload)
+
+    def make() -> Response:
+        return Response(content=body, media_type="application/json")
+
+    return make
+
+
+# Static error factories; the error paths skip JSON encoding entirely
+_ERR_EMPTY_TEXT = _static_error({
+    "success": False,
+    "message": "Input text is empty",
+    "error": "EMPTY_TEXT"
+})
+_ERR_MISSING_PROMPT = _static_error({
+    "success": False,
+    "message": "Either 'index' or 'prompt_audio' must be provided",
+    "error": "MISSING_PROMPT"
+})
+_ERR_EMO_VECTOR_FORMAT = _static_error({
+    "success": False,
+    "message": "Invalid emo_vector JSON format",
+    "error": "INVALID_EMO_VECTOR_FORMAT"
+})
+_ERR_EMO_VECTOR = _static_error({
+    "success": False,
+    "message": "emo_vector must be an array of 8 floats",
+    "error": "INVALID_EMO_VECTOR"
+})
+_ERR_TEXT_TOO_LONG = _static_error({
+    "success": False,
+    "message": f"Input text exceeds {MAX_TEXT_CHARS} characters",
+    "error": "TEXT_TOO_LONG"
+})
+_ERR_UPLOAD_TOO_LARGE = _static_error({
+    "success": False,
+    "message": f"Uploaded audio exceeds {MAX_UPLOAD_BYTES} bytes",
+    "error": "UPLOAD_TOO_LARGE"
+})
+
+
+def _wav_stream_header(sample_rate: int, channels: int = 1, sampwidth: int = 2) -> bytes:
+    """Build a WAV header for a stream of unknown length
+
+    The RIFF and data sizes are set to 0xFFFFFFFF, the streaming convention:
+    players read PCM until the connection closes.
+    """
+    byte_rate = sample_rate * channels * sampwidth
+    return b"".join([
+        b"RIFF", struct.pack("<I", 0xFFFFFFFF), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, channels, sample_rate,
+                             byte_rate, channels * sampwidth, sampwidth * 8),
+        b"data", struct.pack("<I", 0xFFFFFFFF),
+    ])
+
+
+def _cleanup(paths: List[str]):
+    """Remove temp files after the response has been sent"""
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except:
+            pass
 
 
 @app.on_event("startup")
@@ -125,13 +255,12 @@ async def startup_event():
     
     try:
         handler = IndexTTSAPIHandler(
-            config_path=args.config,
-            prompt_cache_path=args.prompt_cache
+            config_path=CONFIG_PATH,
+            prompt_cache_path=PROMPT_CACHE_PATH
         )
         logger.info("✓ API Handler initialized successfully")
-    except Exception as e:
-        logger.error(f"✗ Failed to initialize API Handler: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("✗ Failed to initialize API Handler")
         raise
 
 
@@ -139,22 +268,24 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down IndexTTS API Server...")
+    if handler is not None:
+        handler.shutdown()
 
 
 # ============================================================================
 # API Endpoints
 # ============================================================================
 
-@app.get("/api/v1/health", response_model=HealthResponse)
+@app.get("/api/v1/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """
     Health check endpoint
-    
+
     Returns service status and model information
     """
     try:
-        status = handler.get_health_status()
-        return HealthResponse(**status)
+        # Trusted internal data: model_construct skips field validation
+        return HealthResponse.model_construct(**handler.get_health_status())
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -188,19 +319,21 @@ async def get_concurrency_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/v1/tts", response_model=TTSResponse)
+@app.post("/api/v1/tts", response_class=APIJSONResponse, responses={200: {"model": TTSResponse}})
 async def generate_tts(
+    background: BackgroundTasks,
     input_text: str = Form(..., description="Text to synthesize"),
     index: Optional[str] = Form(None, description="Prompt audio index"),
     prompt_audio: Optional[UploadFile] = File(None, description="Prompt audio file"),
     prompt_text: Optional[str] = Form(None, description="Prompt text (for upload mode)"),
     sample_rate: int = Form(24000, description="Sample rate"),
-    use_cache: str = Form("true", description="Use KV cache"),
-    use_phoneme: str = Form("false", description="Use phoneme control"),
+    use_cache: bool = Form(True, description="Use KV cache"),
+    use_phoneme: bool = Form(False, description="Use phoneme control"),
     sample_method: str = Form("ras", description="Sampling method"),
     sampling: int = Form(25, description="Top-K sampling"),
     beam_size: int = Form(1, description="Beam search size"),
-    seed: int = Form(42, description="Random seed")
+    seed: int = Form(42, description="Random seed"),
+    response_format: str = Form("base64", description="Response format: 'base64' (JSON) or 'wav' (audio stream)")
 ):
     """
     Basic TTS endpoint (GLM-TTS compatible)
@@ -210,15 +343,11 @@ async def generate_tts(
     - Upload mode: Upload 'prompt_audio' file
     """
     try:
-        logger.info(f"[TTS] Request received - text length: {len(input_text)}, index: {index}")
-        
         # Validate input
         if not input_text or len(input_text.strip()) == 0:
-            return TTSResponse(
-                success=False,
-                message="Input text is empty",
-                error="EMPTY_TEXT"
-            )
+            return _ERR_EMPTY_TEXT()
+        if len(input_text) > MAX_TEXT_CHARS:
+            return _ERR_TEXT_TOO_LONG()
         
         # Get prompt audio path
         prompt_path = None
@@ -228,98 +357,144 @@ async def generate_tts(
             # Index mode
             prompt_path = handler.get_prompt_path(index)
             if not prompt_path:
-                return TTSResponse(
-                    success=False,
-                    message=f"Prompt index '{index}' not found",
-                    error="INDEX_NOT_FOUND"
-                )
-            logger.info(f"[TTS] Using indexed prompt: {index} -> {prompt_path}")
+                return APIJSONResponse({
+                    "success": False,
+                    "message": f"Prompt index '{index}' not found",
+                    "error": "INDEX_NOT_FOUND"
+                })
         elif prompt_audio:
-            # Upload mode
-            audio_data = await prompt_audio.read()
-            prompt_path = save_uploaded_audio(audio_data, f"prompt_{int(time.time())}.wav")
+            # Upload mode: stream to disk in 1 MB chunks without blocking the loop
+            prompt_path = f"{_TMPDIR}prompt_{next(_seq)}_{os.getpid()}.wav"
+            total = 0
+            async with aiofiles.open(prompt_path, 'wb') as f:
+                while chunk := await prompt_audio.read(1 << 20):
+                    total += len(chunk)
+                    if total > MAX_UPLOAD_BYTES:
+                        break
+                    await f.write(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                _cleanup([prompt_path])
+                return _ERR_UPLOAD_TOO_LARGE()
             temp_files.append(prompt_path)
-            logger.info(f"[TTS] Using uploaded prompt: {prompt_path}")
         else:
-            return TTSResponse(
-                success=False,
-                message="Either 'index' or 'prompt_audio' must be provided",
-                error="MISSING_PROMPT"
-            )
+            return _ERR_MISSING_PROMPT()
         
         # Convert GLM-TTS parameters to IndexTTS2 parameters
-        gen_params = handler.converter.convert_glm_to_indextts({
-            "sample_method": sample_method,
-            "sampling": sampling,
-            "beam_size": beam_size
-        })
-        
-        logger.info(f"[TTS] Generation parameters: {gen_params}")
-        
-        # Generate output path
-        output_path = os.path.join(tempfile.gettempdir(), f"output_{int(time.time())}.wav")
-        temp_files.append(output_path)
+        gen_params = _convert_glm_params(sample_method, sampling, beam_size)
+
+        # Only the wav response needs a file on disk; for base64 the WAV
+        # is encoded in memory by the handler
+        output_path = None
+        if response_format == "wav":
+            output_path = f"{_TMPDIR}output_{next(_seq)}_{os.getpid()}.wav"
+            temp_files.append(output_path)
         
         # Generate speech
-        success, result, info = await handler.generate_speech(
-            text=input_text,
-            prompt_path=prompt_path,
-            output_path=output_path,
-            verbose=False,
-            **gen_params
-        )
-        
-        if success and result and os.path.exists(result):
-            # Convert to base64
-            audio_base64 = audio_to_base64(result)
-            
-            logger.info(f"[TTS] ✓ Generation successful - time: {info['generation_time']:.2f}s")
-            
-            # Cleanup temp files
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except:
-                    pass
-            
-            return TTSResponse(
-                success=True,
-                message="Audio generated successfully",
-                audio_base64=audio_base64,
-                sample_rate=info.get('sample_rate', 24000),
-                generation_time=info['generation_time']
+        async with _GPU_SEM:
+            success, result, info = await handler.generate_speech(
+                text=input_text,
+                prompt_path=prompt_path,
+                output_path=output_path,
+                verbose=False,
+                **gen_params
             )
+        
+        if success and result and (output_path is None or os.path.exists(result)):
+            logger.info("[TTS] done - index=%s, text=%d chars, time=%.2fs",
+                        index, len(input_text), info['generation_time'])
+
+            # Cleanup happens after the response has been sent
+            background.add_task(_cleanup, temp_files)
+
+            if response_format == "wav":
+                # Stream the WAV straight from disk
+                return FileResponse(result, media_type="audio/wav")
+
+            # result is the in-memory WAV; encode it off the event loop
+            audio_base64 = (await asyncio.to_thread(base64.b64encode, result)).decode('utf-8')
+
+            return APIJSONResponse({
+                "success": True,
+                "message": "Audio generated successfully",
+                "audio_base64": audio_base64,
+                "sample_rate": info.get('sample_rate', 24000),
+                "generation_time": info['generation_time']
+            })
         else:
-            # Cleanup temp files
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except:
-                    pass
-            
+            background.add_task(_cleanup, temp_files)
+
             error_msg = info.get('error', 'Unknown error') if info else 'Generation failed'
-            logger.error(f"[TTS] ✗ Generation failed: {error_msg}")
-            
-            return TTSResponse(
-                success=False,
-                message="Generation failed",
-                error=error_msg
-            )
-    
+            logger.error("[TTS] generation failed: %s", error_msg)
+
+            return APIJSONResponse({
+                "success": False,
+                "message": "Generation failed",
+                "error": error_msg
+            })
+
     except Exception as e:
-        logger.error(f"[TTS] Exception: {e}")
-        traceback.print_exc()
-        return TTSResponse(
-            success=False,
-            message="Internal server error",
-            error=str(e)
-        )
+        logger.exception("[TTS] internal error")
+        return APIJSONResponse({
+            "success": False,
+            "message": "Internal server error",
+            "error": str(e)
+        })
 
 
-@app.post("/api/v1/tts/emotion", response_model=TTSResponse)
+@app.post("/api/v1/tts/stream")
+async def generate_tts_stream(
+    input_text: str = Form(..., description="Text to synthesize"),
+    index: str = Form(..., description="Prompt audio index"),
+    sample_method: str = Form("ras", description="Sampling method"),
+    sampling: int = Form(25, description="Top-K sampling"),
+    beam_size: int = Form(1, description="Beam search size"),
+    seed: int = Form(42, description="Random seed")
+):
+    """
+    Streaming TTS endpoint (index mode only)
+
+    Returns chunked audio/wav: a WAV header followed by int16 PCM as each
+    segment is decoded, so playback can start before synthesis finishes.
+    No base64 inflation and time-to-first-byte is one decoded segment.
+    """
+    # Validate input
+    if not input_text or len(input_text.strip()) == 0:
+        return _ERR_EMPTY_TEXT()
+    if len(input_text) > MAX_TEXT_CHARS:
+        return _ERR_TEXT_TOO_LONG()
+
+    prompt_path = handler.get_prompt_path(index)
+    if not prompt_path:
+        return APIJSONResponse({
+            "success": False,
+            "message": f"Prompt index '{index}' not found",
+            "error": "INDEX_NOT_FOUND"
+        })
+
+    gen_params = _convert_glm_params(sample_method, sampling, beam_size)
+
+    async def _wav_stream():
+        async with _GPU_SEM:
+            yield _wav_stream_header(STREAM_SAMPLE_RATE)
+            try:
+                async for chunk in handler.generate_speech_stream(
+                    text=input_text,
+                    prompt_path=prompt_path,
+                    verbose=False,
+                    **gen_params
+                ):
+                    yield chunk
+            except Exception:
+                # Headers are already on the wire; log and end the stream
+                logger.exception("[TTS-Stream] generation failed")
+
+    logger.info("[TTS-Stream] start - index=%s, text=%d chars", index, len(input_text))
+    return StreamingResponse(_wav_stream(), media_type="audio/wav")
+
+
+@app.post("/api/v1/tts/emotion", response_class=APIJSONResponse, responses={200: {"model": TTSResponse}})
 async def generate_tts_emotion(
+    background: BackgroundTasks,
     input_text: str = Form(..., description="Text to synthesize"),
     index: str = Form(..., description="Speaker prompt audio index"),
     emo_index: Optional[str] = Form(None, description="Emotion prompt audio index"),
@@ -327,9 +502,10 @@ async def generate_tts_emotion(
     emo_alpha: float = Form(1.0, ge=0.0, le=1.0, description="Emotion weight"),
     emo_vector: Optional[str] = Form(None, description="8-dim emotion vector as JSON array"),
     emo_text: Optional[str] = Form(None, description="Emotion description text"),
-    use_random: str = Form("false", description="Use random emotion sampling"),
+    use_random: bool = Form(False, description="Use random emotion sampling"),
     sample_rate: int = Form(24000, description="Sample rate"),
-    beam_size: int = Form(1, description="Beam search size")
+    beam_size: int = Form(1, description="Beam search size"),
+    response_format: str = Form("base64", description="Response format: 'base64' (JSON) or 'wav' (audio stream)")
 ):
     """
     Emotion-controlled TTS endpoint (IndexTTS specific)
@@ -341,24 +517,20 @@ async def generate_tts_emotion(
     - Use emo_text for text-based emotion
     """
     try:
-        logger.info(f"[TTS-EMO] Request - text: {len(input_text)}chars, speaker: {index}, emo_index: {emo_index}")
-        
         # Validate input
         if not input_text or len(input_text.strip()) == 0:
-            return TTSResponse(
-                success=False,
-                message="Input text is empty",
-                error="EMPTY_TEXT"
-            )
+            return _ERR_EMPTY_TEXT()
+        if len(input_text) > MAX_TEXT_CHARS:
+            return _ERR_TEXT_TOO_LONG()
         
         # Get speaker prompt path
         prompt_path = handler.get_prompt_path(index)
         if not prompt_path:
-            return TTSResponse(
-                success=False,
-                message=f"Speaker prompt index '{index}' not found",
-                error="INDEX_NOT_FOUND"
-            )
+            return APIJSONResponse({
+                "success": False,
+                "message": f"Speaker prompt index '{index}' not found",
+                "error": "INDEX_NOT_FOUND"
+            })
         
         # Handle emotion reference
         emo_audio_path = None
@@ -370,127 +542,122 @@ async def generate_tts_emotion(
                 # Try as speaker prompt
                 emo_audio_path = handler.get_prompt_path(emo_index)
             if not emo_audio_path:
-                return TTSResponse(
-                    success=False,
-                    message=f"Emotion index '{emo_index}' not found",
-                    error="EMO_INDEX_NOT_FOUND"
-                )
-            logger.info(f"[TTS-EMO] Using emotion index: {emo_index}")
+                return APIJSONResponse({
+                    "success": False,
+                    "message": f"Emotion index '{emo_index}' not found",
+                    "error": "EMO_INDEX_NOT_FOUND"
+                })
         elif emo_audio:
-            audio_data = await emo_audio.read()
-            emo_audio_path = save_uploaded_audio(audio_data, f"emo_{int(time.time())}.wav")
+            emo_audio_path = f"{_TMPDIR}emo_{next(_seq)}_{os.getpid()}.wav"
+            total = 0
+            async with aiofiles.open(emo_audio_path, 'wb') as f:
+                while chunk := await emo_audio.read(1 << 20):
+                    total += len(chunk)
+                    if total > MAX_UPLOAD_BYTES:
+                        break
+                    await f.write(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                _cleanup([emo_audio_path])
+                return _ERR_UPLOAD_TOO_LARGE()
             temp_files.append(emo_audio_path)
-            logger.info(f"[TTS-EMO] Using uploaded emotion audio")
         
         # Parse emotion vector
         emo_vec = None
         if emo_vector:
             try:
-                emo_vec = json.loads(emo_vector)
-                if not isinstance(emo_vec, list) or len(emo_vec) != 8:
-                    return TTSResponse(
-                        success=False,
-                        message="emo_vector must be an array of 8 floats",
-                        error="INVALID_EMO_VECTOR"
-                    )
-                logger.info(f"[TTS-EMO] Using emotion vector: {emo_vec}")
-            except json.JSONDecodeError:
-                return TTSResponse(
-                    success=False,
-                    message="Invalid emo_vector JSON format",
-                    error="INVALID_EMO_VECTOR_FORMAT"
-                )
-        
-        # Parse use_random
-        use_random_bool = use_random.lower() == "true"
+                parsed = orjson.loads(emo_vector)
+            except orjson.JSONDecodeError:
+                return _ERR_EMO_VECTOR_FORMAT()
+            try:
+                # Numeric cast rejects non-float entries, not just non-lists
+                arr = np.asarray(parsed, dtype=np.float32)
+                if arr.shape != (8,):
+                    raise ValueError
+            except (TypeError, ValueError):
+                return _ERR_EMO_VECTOR()
+            emo_vec = arr.tolist()
         
         # Determine use_emo_text
         use_emo_text = emo_text is not None and len(emo_text.strip()) > 0
         
         # Generation parameters
-        gen_params = handler.converter.convert_glm_to_indextts({
-            "beam_size": beam_size
-        })
+        gen_params = _convert_glm_params(beam_size=beam_size)
         
-        # Generate output path
-        output_path = os.path.join(tempfile.gettempdir(), f"output_{int(time.time())}.wav")
-        temp_files.append(output_path)
+        # Only the wav response needs a file on disk; for base64 the WAV
+        # is encoded in memory by the handler
+        output_path = None
+        if response_format == "wav":
+            output_path = f"{_TMPDIR}output_{next(_seq)}_{os.getpid()}.wav"
+            temp_files.append(output_path)
         
         # Generate speech
-        success, result, info = await handler.generate_speech(
-            text=input_text,
-            prompt_path=prompt_path,
-            output_path=output_path,
-            emo_audio_path=emo_audio_path,
-            emo_alpha=emo_alpha,
-            emo_vector=emo_vec,
-            use_emo_text=use_emo_text,
-            emo_text=emo_text,
-            use_random=use_random_bool,
-            verbose=False,
-            **gen_params
-        )
-        
-        if success and result and os.path.exists(result):
-            # Convert to base64
-            audio_base64 = audio_to_base64(result)
-            
-            logger.info(f"[TTS-EMO] ✓ Success - time: {info['generation_time']:.2f}s")
-            
-            # Cleanup
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except:
-                    pass
-            
-            return TTSResponse(
-                success=True,
-                message="Audio generated successfully with emotion control",
-                audio_base64=audio_base64,
-                sample_rate=info.get('sample_rate', 24000),
-                generation_time=info['generation_time']
+        async with _GPU_SEM:
+            success, result, info = await handler.generate_speech(
+                text=input_text,
+                prompt_path=prompt_path,
+                output_path=output_path,
+                emo_audio_path=emo_audio_path,
+                emo_alpha=emo_alpha,
+                emo_vector=emo_vec,
+                use_emo_text=use_emo_text,
+                emo_text=emo_text,
+                use_random=use_random,
+                verbose=False,
+                **gen_params
             )
+
+        if success and result and (output_path is None or os.path.exists(result)):
+            logger.info("[TTS-EMO] done - index=%s, emo_index=%s, time=%.2fs",
+                        index, emo_index, info['generation_time'])
+
+            background.add_task(_cleanup, temp_files)
+
+            if response_format == "wav":
+                return FileResponse(result, media_type="audio/wav")
+
+            # result is the in-memory WAV; encode it off the event loop
+            audio_base64 = (await asyncio.to_thread(base64.b64encode, result)).decode('utf-8')
+
+            return APIJSONResponse({
+                "success": True,
+                "message": "Audio generated successfully with emotion control",
+                "audio_base64": audio_base64,
+                "sample_rate": info.get('sample_rate', 24000),
+                "generation_time": info['generation_time']
+            })
         else:
-            # Cleanup
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except:
-                    pass
-            
+            background.add_task(_cleanup, temp_files)
+
             error_msg = info.get('error', 'Unknown error') if info else 'Generation failed'
-            logger.error(f"[TTS-EMO] ✗ Failed: {error_msg}")
-            
-            return TTSResponse(
-                success=False,
-                message="Generation failed",
-                error=error_msg
-            )
-    
+            logger.error("[TTS-EMO] generation failed: %s", error_msg)
+
+            return APIJSONResponse({
+                "success": False,
+                "message": "Generation failed",
+                "error": error_msg
+            })
+
     except Exception as e:
-        logger.error(f"[TTS-EMO] Exception: {e}")
-        traceback.print_exc()
-        return TTSResponse(
-            success=False,
-            message="Internal server error",
-            error=str(e)
-        )
+        logger.exception("[TTS-EMO] internal error")
+        return APIJSONResponse({
+            "success": False,
+            "message": "Internal server error",
+            "error": str(e)
+        })
 
 
-@app.post("/api/v1/tts/advanced", response_model=TTSResponse)
+@app.post("/api/v1/tts/advanced", response_class=APIJSONResponse, responses={200: {"model": TTSResponse}})
 async def generate_tts_advanced(
+    background: BackgroundTasks,
     input_text: str = Form(..., description="Text to synthesize"),
     index: str = Form(..., description="Speaker prompt audio index"),
     emo_index: Optional[str] = Form(None, description="Emotion prompt audio index"),
     emo_alpha: float = Form(1.0, description="Emotion weight"),
     emo_vector: Optional[str] = Form(None, description="8-dim emotion vector"),
     emo_text: Optional[str] = Form(None, description="Emotion description"),
-    use_random: str = Form("false", description="Random emotion sampling"),
+    use_random: bool = Form(False, description="Random emotion sampling"),
     # Advanced generation parameters
-    do_sample: str = Form("true", description="Enable sampling"),
+    do_sample: bool = Form(True, description="Enable sampling"),
     temperature: float = Form(0.8, description="Temperature"),
     top_p: float = Form(0.8, description="Top-p"),
     top_k: int = Form(30, description="Top-k"),
@@ -498,7 +665,8 @@ async def generate_tts_advanced(
     repetition_penalty: float = Form(10.0, description="Repetition penalty"),
     length_penalty: float = Form(0.0, description="Length penalty"),
     max_mel_tokens: int = Form(1500, description="Max mel tokens"),
-    max_text_tokens_per_segment: int = Form(120, description="Max text tokens per segment")
+    max_text_tokens_per_segment: int = Form(120, description="Max text tokens per segment"),
+    response_format: str = Form("base64", description="Response format: 'base64' (JSON) or 'wav' (audio stream)")
 ):
     """
     Advanced TTS endpoint with full parameter control
@@ -506,24 +674,20 @@ async def generate_tts_advanced(
     Exposes all IndexTTS2 generation parameters
     """
     try:
-        logger.info(f"[TTS-ADV] Request - text: {len(input_text)}chars, index: {index}")
-        
         # Validate input
         if not input_text or len(input_text.strip()) == 0:
-            return TTSResponse(
-                success=False,
-                message="Input text is empty",
-                error="EMPTY_TEXT"
-            )
+            return _ERR_EMPTY_TEXT()
+        if len(input_text) > MAX_TEXT_CHARS:
+            return _ERR_TEXT_TOO_LONG()
         
         # Get speaker prompt path
         prompt_path = handler.get_prompt_path(index)
         if not prompt_path:
-            return TTSResponse(
-                success=False,
-                message=f"Speaker prompt index '{index}' not found",
-                error="INDEX_NOT_FOUND"
-            )
+            return APIJSONResponse({
+                "success": False,
+                "message": f"Speaker prompt index '{index}' not found",
+                "error": "INDEX_NOT_FOUND"
+            })
         
         # Handle emotion
         emo_audio_path = None
@@ -536,24 +700,18 @@ async def generate_tts_advanced(
         emo_vec = None
         if emo_vector:
             try:
-                emo_vec = json.loads(emo_vector)
-                if not isinstance(emo_vec, list) or len(emo_vec) != 8:
+                emo_vec = np.asarray(orjson.loads(emo_vector), dtype=np.float32)
+                if emo_vec.shape != (8,):
                     raise ValueError("Must be 8-element array")
+                emo_vec = emo_vec.tolist()
             except:
-                return TTSResponse(
-                    success=False,
-                    message="Invalid emo_vector format",
-                    error="INVALID_EMO_VECTOR"
-                )
+                return _ERR_EMO_VECTOR()
         
-        # Parse boolean parameters
-        use_random_bool = use_random.lower() == "true"
-        do_sample_bool = do_sample.lower() == "true"
         use_emo_text = emo_text is not None and len(emo_text.strip()) > 0
-        
+
         # Generation parameters
         gen_params = {
-            "do_sample": do_sample_bool,
+            "do_sample": do_sample,
             "temperature": temperature,
             "top_p": top_p,
             "top_k": top_k if top_k > 0 else None,
@@ -564,60 +722,64 @@ async def generate_tts_advanced(
             "max_text_tokens_per_segment": max_text_tokens_per_segment
         }
         
-        # Output path
-        output_path = os.path.join(tempfile.gettempdir(), f"output_{int(time.time())}.wav")
-        
+        # Only the wav response needs a file on disk
+        output_path = None
+        if response_format == "wav":
+            output_path = f"{_TMPDIR}output_{next(_seq)}_{os.getpid()}.wav"
+
         # Generate speech
-        success, result, info = await handler.generate_speech(
-            text=input_text,
-            prompt_path=prompt_path,
-            output_path=output_path,
-            emo_audio_path=emo_audio_path,
-            emo_alpha=emo_alpha,
-            emo_vector=emo_vec,
-            use_emo_text=use_emo_text,
-            emo_text=emo_text,
-            use_random=use_random_bool,
-            verbose=False,
-            **gen_params
-        )
-        
-        if success and result and os.path.exists(result):
-            audio_base64 = audio_to_base64(result)
-            
-            logger.info(f"[TTS-ADV] ✓ Success - time: {info['generation_time']:.2f}s")
-            
-            # Cleanup
-            try:
-                os.remove(output_path)
-            except:
-                pass
-            
-            return TTSResponse(
-                success=True,
-                message="Audio generated successfully",
-                audio_base64=audio_base64,
-                sample_rate=info.get('sample_rate', 24000),
-                generation_time=info['generation_time']
+        async with _GPU_SEM:
+            success, result, info = await handler.generate_speech(
+                text=input_text,
+                prompt_path=prompt_path,
+                output_path=output_path,
+                emo_audio_path=emo_audio_path,
+                emo_alpha=emo_alpha,
+                emo_vector=emo_vec,
+                use_emo_text=use_emo_text,
+                emo_text=emo_text,
+                use_random=use_random,
+                verbose=False,
+                **gen_params
             )
+
+        if success and result and (output_path is None or os.path.exists(result)):
+            logger.info("[TTS-ADV] done - index=%s, text=%d chars, time=%.2fs",
+                        index, len(input_text), info['generation_time'])
+
+            if output_path:
+                background.add_task(_cleanup, [output_path])
+
+            if response_format == "wav":
+                return FileResponse(result, media_type="audio/wav")
+
+            # result is the in-memory WAV; encode it off the event loop
+            audio_base64 = (await asyncio.to_thread(base64.b64encode, result)).decode('utf-8')
+
+            return APIJSONResponse({
+                "success": True,
+                "message": "Audio generated successfully",
+                "audio_base64": audio_base64,
+                "sample_rate": info.get('sample_rate', 24000),
+                "generation_time": info['generation_time']
+            })
         else:
             error_msg = info.get('error', 'Unknown error') if info else 'Generation failed'
-            logger.error(f"[TTS-ADV] ✗ Failed: {error_msg}")
-            
-            return TTSResponse(
-                success=False,
-                message="Generation failed",
-                error=error_msg
-            )
-    
+            logger.error("[TTS-ADV] generation failed: %s", error_msg)
+
+            return APIJSONResponse({
+                "success": False,
+                "message": "Generation failed",
+                "error": error_msg
+            })
+
     except Exception as e:
-        logger.error(f"[TTS-ADV] Exception: {e}")
-        traceback.print_exc()
-        return TTSResponse(
-            success=False,
-            message="Internal server error",
-            error=str(e)
-        )
+        logger.exception("[TTS-ADV] internal error")
+        return APIJSONResponse({
+            "success": False,
+            "message": "Internal server error",
+            "error": str(e)
+        })
 
 
 @app.post("/api/v1/cache/clear")
@@ -646,24 +808,54 @@ if __name__ == "__main__":
     parser.add_argument("--fp16", action="store_true", help="Enable FP16 (overrides config)")
     parser.add_argument("--device", type=str, default=None, help="Device (overrides config)")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Uvicorn worker count (each worker loads its own model copy; "
+                             "keep 1 unless you have GPU memory to spare)")
     args = parser.parse_args()
+
+    # Propagate config paths to worker subprocesses
+    os.environ["INDEXTTS_API_CONFIG"] = args.config
+    os.environ["INDEXTTS_PROMPT_CACHE"] = args.prompt_cache
+
+    # Single-worker is the intended deployment for this GPU service: the
+    # model weights cannot be shared across processes, so every extra
+    # worker pays full model load time and a full copy of the weights in
+    # VRAM. Concurrency comes from the asyncio layer (the GPU semaphore
+    # plus the handler's length-based admission control) instead.
+    if args.workers > 1:
+        logger.warning(
+            "Running %d workers: each worker loads its own copy of the model "
+            "(%dx load time and VRAM). Prefer --workers 1 and tune TTS_GPU_SLOTS.",
+            args.workers, args.workers
+        )
     
-    # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-    
-    # Run server
-    logger.info(f"Starting server on {args.api_host}:{args.api_port}")
+    # uvloop/httptools are optional accelerators, not declared
+    # dependencies; fall back to the stdlib loop/parser when absent
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "auto"
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "auto"
+
+    # Run server (the app is passed as an import string so
+    # --workers / --reload work)
+    logger.info(f"Starting server on {args.api_host}:{args.api_port} ({args.workers} worker(s))")
     uvicorn.run(
-        app,
+        "api_server:app",
         host=args.api_host,
         port=args.api_port,
+        workers=args.workers,
         reload=args.reload,
+        loop=loop_impl,
+        http=http_impl,
+        limit_concurrency=1000,
+        timeout_keep_alive=30,
+        access_log=False,
         log_level="info"
     )
 
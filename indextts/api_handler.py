@@ -4,14 +4,21 @@ Handles TTS generation requests with concurrency control and caching
 """
 
 import asyncio
-import base64
-import json
+import collections
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import logging
+import logging.handlers
 import os
+import queue as queue_module
 import time
 import threading
 from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 
+import orjson
 import torch
 import torchaudio
 import numpy as np
@@ -19,62 +26,99 @@ from omegaconf import OmegaConf
 
 from indextts.infer_v2 import IndexTTS2
 
+logger = logging.getLogger("indextts.api")
+
+
+def _setup_logging():
+    """Route records through a queue so formatting and stderr writes
+    happen on a listener thread instead of the request path"""
+    if logger.handlers:
+        return
+    log_queue = queue_module.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    listener = logging.handlers.QueueListener(log_queue, stream)
+    listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_setup_logging()
+
 
 class PromptCache:
-    """Cache for audio prompt features"""
-    
-    def __init__(self, max_size: int = 50):
+    """Sharded LRU cache for audio prompt features
+
+    Keys are spread over N independent OrderedDict shards, each with its
+    own lock, so concurrent requests for different prompts don't
+    serialize on one global mutex.
+    """
+
+    def __init__(self, max_size: int = 50, num_shards: int = 16):
         self.max_size = max_size
-        self.cache: Dict[str, Any] = {}
-        self.access_order: List[str] = []
-        self.lock = threading.Lock()
-    
+        self.num_shards = num_shards
+        # Each shard enforces its slice of the total budget
+        self._shard_max = max(1, (max_size + num_shards - 1) // num_shards)
+        self._shards = [
+            (threading.Lock(), collections.OrderedDict()) for _ in range(num_shards)
+        ]
+
+    def _shard(self, key: str):
+        return self._shards[(hash(key) & 0x7fffffff) % self.num_shards]
+
     def get(self, key: str) -> Optional[Any]:
         """Get cached item"""
-        with self.lock:
-            if key in self.cache:
-                # Update access order (LRU)
-                self.access_order.remove(key)
-                self.access_order.append(key)
-                return self.cache[key]
-            return None
-    
+        lock, cache = self._shard(key)
+        with lock:
+            value = cache.get(key)
+            if value is not None:
+                # move_to_end on hit keeps per-shard LRU order, O(1)
+                cache.move_to_end(key)
+            return value
+
     def put(self, key: str, value: Any):
         """Put item into cache"""
-        with self.lock:
-            # Remove oldest if cache is full
-            if len(self.cache) >= self.max_size and key not in self.cache:
-                oldest = self.access_order.pop(0)
-                del self.cache[oldest]
-            
-            # Add or update cache
-            if key in self.cache:
-                self.access_order.remove(key)
-            self.cache[key] = value
-            self.access_order.append(key)
-    
+        lock, cache = self._shard(key)
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+            elif len(cache) >= self._shard_max:
+                # Evict the shard's least recently used entry
+                cache.popitem(last=False)
+            cache[key] = value
+
     def clear(self):
         """Clear all cache"""
-        with self.lock:
-            self.cache.clear()
-            self.access_order.clear()
-    
+        for lock, cache in self._shards:
+            with lock:
+                cache.clear()
+
     def size(self) -> int:
-        """Get cache size"""
-        return len(self.cache)
+        """Get cache size (best-effort, not synchronized across shards)"""
+        return sum(len(cache) for _, cache in self._shards)
 
 
 class ConcurrencyController:
-    """Control concurrent TTS requests based on text length"""
-    
+    """Control concurrent TTS requests based on text length
+
+    The semaphores are event-loop-local and must only be used from
+    coroutines. The task counters are mutated from the single inference
+    worker thread and read from the loop; they are best-effort
+    statistics, not synchronization primitives.
+    """
+
     def __init__(self, max_short: int = 3, max_medium: int = 2, max_long: int = 1):
         self.semaphore_short = asyncio.Semaphore(max_short)
         self.semaphore_medium = asyncio.Semaphore(max_medium)
         self.semaphore_long = asyncio.Semaphore(max_long)
         self.current_tasks = 0
         self.total_requests = 0
-        self.lock = threading.Lock()
-    
+        # Atomic in C, so the request total needs no lock
+        self._total = itertools.count(1)
+
     def get_semaphore(self, text_length: int) -> asyncio.Semaphore:
         """Get appropriate semaphore based on text length"""
         if text_length <= 100:
@@ -83,17 +127,15 @@ class ConcurrencyController:
             return self.semaphore_medium
         else:
             return self.semaphore_long
-    
+
     def increment_task(self):
-        """Increment current task count"""
-        with self.lock:
-            self.current_tasks += 1
-            self.total_requests += 1
-    
+        """Increment current task count (called on the inference thread)"""
+        self.current_tasks += 1
+        self.total_requests = next(self._total)
+
     def decrement_task(self):
-        """Decrement current task count"""
-        with self.lock:
-            self.current_tasks = max(0, self.current_tasks - 1)
+        """Decrement current task count (called on the inference thread)"""
+        self.current_tasks = max(0, self.current_tasks - 1)
     
     def get_stats(self) -> Dict[str, int]:
         """Get concurrency statistics"""
@@ -106,22 +148,33 @@ class ConcurrencyController:
         }
 
 
+# Pass-through generation parameters: (glm_key, indextts_key, default).
+# Built once so the per-request conversion is a single comprehension.
+_GLM_MAP = (
+    ("temperature", "temperature", 0.8),
+    ("top_p", "top_p", 0.8),
+    ("repetition_penalty", "repetition_penalty", 10.0),
+    ("length_penalty", "length_penalty", 0.0),
+    ("max_mel_tokens", "max_mel_tokens", 1500),
+)
+
+
 class ParameterConverter:
     """Convert GLM-TTS style parameters to IndexTTS2 parameters"""
-    
+
     @staticmethod
     def convert_glm_to_indextts(params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert GLM-TTS parameters to IndexTTS2 parameters
-        
+
         Args:
             params: GLM-TTS style parameters
-            
+
         Returns:
             IndexTTS2 compatible parameters
         """
-        result = {}
-        
+        result = {dst: params.get(src, default) for src, dst, default in _GLM_MAP}
+
         # Sample method conversion
         sample_method = params.get("sample_method", "ras").lower()
         if sample_method == "ras":
@@ -129,22 +182,15 @@ class ParameterConverter:
         elif sample_method == "topk":
             result["do_sample"] = True
             result["top_k"] = params.get("sampling", 25)
-        
+
         # Beam size
         if "beam_size" in params:
             result["num_beams"] = params["beam_size"]
-        
+
         # Sampling parameter
         if "sampling" in params and sample_method != "topk":
             result["top_k"] = params["sampling"]
-        
-        # Other generation parameters with defaults
-        result["temperature"] = params.get("temperature", 0.8)
-        result["top_p"] = params.get("top_p", 0.8)
-        result["repetition_penalty"] = params.get("repetition_penalty", 10.0)
-        result["length_penalty"] = params.get("length_penalty", 0.0)
-        result["max_mel_tokens"] = params.get("max_mel_tokens", 1500)
-        
+
         return result
 
 
@@ -162,15 +208,15 @@ class IndexTTSAPIHandler:
         """
         # Load configurations
         self.config = OmegaConf.load(config_path)
-        with open(prompt_cache_path, 'r', encoding='utf-8') as f:
-            self.prompt_config = json.load(f)
+        with open(prompt_cache_path, 'rb') as f:
+            self.prompt_config = orjson.loads(f.read())
         
         # Initialize TTS model
-        print(f"[API] Initializing IndexTTS2 model...")
-        print(f"[API] Model dir: {self.config.model.model_dir}")
-        print(f"[API] Config path: {self.config.model.config_path}")
-        print(f"[API] FP16: {self.config.model.use_fp16}")
-        print(f"[API] Device: {self.config.model.device}")
+        logger.info(f"Initializing IndexTTS2 model...")
+        logger.info(f"Model dir: {self.config.model.model_dir}")
+        logger.info(f"Config path: {self.config.model.config_path}")
+        logger.info(f"FP16: {self.config.model.use_fp16}")
+        logger.info(f"Device: {self.config.model.device}")
         
         self.tts = IndexTTS2(
             cfg_path=self.config.model.config_path,
@@ -181,7 +227,31 @@ class IndexTTSAPIHandler:
             device=None if self.config.model.device == "auto" else self.config.model.device
         )
         
-        print(f"[API] Model loaded successfully on device: {self.tts.device}")
+        logger.info(f"Model loaded successfully on device: {self.tts.device}")
+
+        # On Ampere+ run the GPT in bf16: same bandwidth win as fp16 but
+        # with fp32's exponent range, so attention softmax can't overflow
+        if (self.tts.use_fp16 and torch.cuda.is_available()
+                and torch.cuda.get_device_capability(self.tts.device)[0] >= 8):
+            self.tts.gpt = self.tts.gpt.to(torch.bfloat16)
+            self.tts.dtype = torch.bfloat16
+            logger.info("GPT cast to bfloat16 (compute capability >= 8.0)")
+
+        # CUDA-graph the per-token decoder forward. The decode loop runs
+        # through HuggingFace generate() with dynamic shapes and sampling
+        # inside the loop, so rather than hand-capturing a
+        # torch.cuda.CUDAGraph we let torch.compile's reduce-overhead
+        # mode graph the forward per shape bucket. Opt-in: the first
+        # requests per bucket pay compilation time.
+        if (self.config.model.get("use_cuda_graphs", False)
+                and torch.cuda.is_available()):
+            try:
+                self.tts.gpt.inference_model.forward = torch.compile(
+                    self.tts.gpt.inference_model.forward, mode="reduce-overhead"
+                )
+                logger.info("Decoder forward compiled with CUDA graphs")
+            except Exception as e:
+                logger.warning(f"CUDA-graph compile unavailable: {e}")
         
         # Initialize components
         self.prompt_cache = PromptCache(max_size=self.config.cache.max_cached_prompts)
@@ -191,39 +261,126 @@ class IndexTTSAPIHandler:
             max_long=self.config.concurrency.max_concurrent_long
         )
         self.converter = ParameterConverter()
-        
+
+        # One dedicated CUDA stream for all inferences: the caching
+        # allocator keeps one pool per stream, so a shared stream lets
+        # freed KV-cache/mel blocks be reused across requests instead of
+        # re-hitting cudaMalloc. Allocator tuned against fragmentation.
+        # Backend knobs: let cuDNN autotune conv algorithms for the fixed
+        # mel/vocoder shapes and allow TF32 matmuls on Ampere+
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision("high")
+
+        self._stream = None
+        if torch.cuda.is_available() and str(self.tts.device).startswith("cuda"):
+            self._stream = torch.cuda.Stream(device=self.tts.device)
+            try:
+                torch.cuda.memory._set_allocator_settings(
+                    "expandable_segments:True,max_split_size_mb:256"
+                )
+            except RuntimeError as e:
+                logger.warning(f"Allocator settings not applied: {e}")
+
+        # Dedicated executor sized to the GPU; the asyncio default pool
+        # admits up to min(32, cpu+4) concurrent forwards, which thrashes
+        # a single device
+        self._infer_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.concurrency.gpu_workers,
+            thread_name_prefix="tts-infer"
+        )
+
+        # Per-voice micro-batching: requests for the same prompt arriving
+        # within a short window are drained together and run back-to-back
+        # in one executor submission (one worker task + queue per voice)
+        self.batch_max = self.config.concurrency.batch_max
+        self.batch_window_ms = self.config.concurrency.batch_window_ms
+        self._batch_queues: Dict[str, asyncio.Queue] = {}
+        self._batch_workers: Dict[str, Any] = {}
+
+        # Flat index -> canonical path maps built once at startup, so the
+        # per-request lookup is a single dict get; realpath keeps cache
+        # keys stable across relative/absolute/symlinked spellings
+        self._prompt_paths = {
+            idx: os.path.realpath(info['path'])
+            for idx, info in self.prompt_config['prompts'].items()
+        }
+        self._emotion_paths = {
+            idx: os.path.realpath(info['path'])
+            for idx, info in self.prompt_config['emotions'].items()
+        }
+
+        # Only conditioning for configured prompts/emotions is cached;
+        # uploaded one-shot audio would just churn the LRU
+        self._cacheable_paths = (
+            set(self._prompt_paths.values()) | set(self._emotion_paths.values())
+        )
+
         # Preload prompts if enabled
         if self.config.cache.enable_prompt_cache and self.config.cache.preload_all_prompts:
             self._preload_prompts()
         
-        print(f"[API] API Handler initialized successfully")
-        print(f"[API] Available prompts: {len(self.prompt_config['prompts'])}")
-        print(f"[API] Available emotions: {len(self.prompt_config['emotions'])}")
+        # Warm-up pass: the first forward pays cudnn autotune, cuBLAS
+        # heuristics and allocator growth; spend that here instead of on
+        # the first user-visible request
+        if self._prompt_paths:
+            warmup_prompt = next(iter(self._prompt_paths.values()))
+            if os.path.exists(warmup_prompt):
+                try:
+                    logger.info("Running warm-up inference...")
+                    self._sync_generate(
+                        "测试。", warmup_prompt, None,
+                        None, 1.0, None, False, None, False, False, {}
+                    )
+                    logger.info("Warm-up complete")
+                except Exception as e:
+                    logger.warning(f"Warm-up inference failed (non-fatal): {e}")
+
+        logger.info(f"API Handler initialized successfully")
+        logger.info(f"Available prompts: {len(self.prompt_config['prompts'])}")
+        logger.info(f"Available emotions: {len(self.prompt_config['emotions'])}")
     
     def _preload_prompts(self):
-        """Preload all indexed prompts into cache"""
-        print("[API] Preloading prompt features...")
-        # Note: Feature extraction would happen here in production
-        # For now, we just validate files exist
-        for idx, info in self.prompt_config['prompts'].items():
-            file_path = info['path']
+        """Pre-extract conditioning features for all indexed prompts"""
+        logger.info("Preloading prompt features...")
+        for idx, file_path in self._prompt_paths.items():
             if os.path.exists(file_path):
-                print(f"[API]   ✓ {idx}: {file_path}")
+                self._get_spk_conditioning(file_path)
+                logger.info(f"  ✓ {idx}: {file_path}")
             else:
-                print(f"[API]   ✗ {idx}: {file_path} NOT FOUND")
-        print("[API] Preload complete")
-    
+                logger.warning(f"  ✗ {idx}: {file_path} NOT FOUND")
+        for idx, file_path in self._emotion_paths.items():
+            if os.path.exists(file_path):
+                self._get_emo_conditioning(file_path)
+                logger.info(f"  ✓ {idx}: {file_path} (emotion)")
+            else:
+                logger.warning(f"  ✗ {idx}: {file_path} NOT FOUND")
+        logger.info("Preload complete")
+
+    def _get_spk_conditioning(self, prompt_path: str):
+        """Get (or extract and cache) speaker conditioning tensors for a prompt"""
+        key = "spk::" + prompt_path
+        cond = self.prompt_cache.get(key)
+        if cond is None:
+            cond = self.tts.extract_spk_conditioning(prompt_path)
+            self.prompt_cache.put(key, cond)
+        return cond
+
+    def _get_emo_conditioning(self, emo_path: str):
+        """Get (or extract and cache) the emotion conditioning embedding"""
+        key = "emo::" + emo_path
+        cond = self.prompt_cache.get(key)
+        if cond is None:
+            cond = self.tts.extract_emo_conditioning(emo_path)
+            self.prompt_cache.put(key, cond)
+        return cond
+
     def get_prompt_path(self, index: str) -> Optional[str]:
         """Get prompt audio file path from index"""
-        if index in self.prompt_config['prompts']:
-            return self.prompt_config['prompts'][index]['path']
-        return None
-    
+        return self._prompt_paths.get(index)
+
     def get_emotion_path(self, emo_index: str) -> Optional[str]:
         """Get emotion audio file path from index"""
-        if emo_index in self.prompt_config['emotions']:
-            return self.prompt_config['emotions'][emo_index]['path']
-        return None
+        return self._emotion_paths.get(emo_index)
     
     def list_prompts(self) -> Dict[str, Any]:
         """List all available prompts"""
@@ -270,41 +427,218 @@ class IndexTTSAPIHandler:
             semaphore = self.concurrency.get_semaphore(text_length)
             
             async with semaphore:
-                self.concurrency.increment_task()
-                
-                try:
-                    start_time = time.time()
-                    
-                    # Run inference in thread pool to avoid blocking
-                    loop = asyncio.get_event_loop()
+                start_time = time.time()
+
+                job = (text, prompt_path, output_path,
+                       emo_audio_path, emo_alpha, emo_vector,
+                       use_emo_text, emo_text, use_random,
+                       verbose, generation_kwargs)
+
+                if self.batch_max > 1 and prompt_path in self._cacheable_paths:
+                    # Coalesce with other requests for the same voice
+                    result = await self._submit_batched(prompt_path, job)
+                else:
+                    # Run inference in the GPU-bounded thread pool
+                    loop = asyncio.get_running_loop()
                     result = await loop.run_in_executor(
-                        None,
-                        self._sync_generate,
-                        text, prompt_path, output_path,
-                        emo_audio_path, emo_alpha, emo_vector,
-                        use_emo_text, emo_text, use_random,
-                        verbose, generation_kwargs
+                        self._infer_executor, self._sync_generate, *job
                     )
-                    
-                    generation_time = time.time() - start_time
-                    
-                    info = {
-                        "generation_time": generation_time,
-                        "text_length": text_length,
-                        "sample_rate": 24000
-                    }
-                    
-                    return True, result, info
-                    
-                finally:
-                    self.concurrency.decrement_task()
+
+                generation_time = time.time() - start_time
+
+                info = {
+                    "generation_time": generation_time,
+                    "text_length": text_length,
+                    "sample_rate": 24000
+                }
+
+                return True, result, info
                     
         except Exception as e:
-            print(f"[API ERROR] Generation failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Generation failed")
             return False, None, {"error": str(e)}
     
+    async def _submit_batched(self, prompt_path: str, job: Tuple) -> Any:
+        """Queue a job on the per-voice micro-batcher (worker created on demand)"""
+        loop = asyncio.get_running_loop()
+        queue = self._batch_queues.get(prompt_path)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._batch_queues[prompt_path] = queue
+            self._batch_workers[prompt_path] = loop.create_task(
+                self._batch_worker(queue)
+            )
+        future = loop.create_future()
+        queue.put_nowait((job, future))
+        return await future
+
+    async def _batch_worker(self, queue: asyncio.Queue):
+        """Drain same-voice jobs in small windows and run them together
+
+        The whole batch goes to the executor as one submission, so the
+        voice's conditioning is fetched once and no other voice's work
+        interleaves between the items.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window_ms / 1000.0
+            while len(batch) < self.batch_max:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            results = await loop.run_in_executor(
+                self._infer_executor,
+                self._sync_generate_batch,
+                [job for job, _ in batch]
+            )
+            for (_, future), result in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _sync_generate_batch(self, jobs: List[Tuple]) -> List[Any]:
+        """Run a drained batch back-to-back on the inference thread"""
+        results = []
+        for job in jobs:
+            try:
+                results.append(self._sync_generate(*job))
+            except Exception as e:  # delivered to the matching future
+                results.append(e)
+        return results
+
+    async def generate_speech_stream(
+        self,
+        text: str,
+        prompt_path: str,
+        emo_audio_path: Optional[str] = None,
+        emo_alpha: float = 1.0,
+        emo_vector: Optional[List[float]] = None,
+        use_emo_text: bool = False,
+        emo_text: Optional[str] = None,
+        use_random: bool = False,
+        verbose: bool = False,
+        **generation_kwargs
+    ):
+        """
+        Stream speech as raw int16 PCM chunks
+
+        Runs the decoder as a generator on the inference thread and yields
+        each synthesized segment (plus inter-segment silence) as bytes, so
+        callers can start sending audio before the full text is done.
+        """
+        text_length = len(text)
+        semaphore = self.concurrency.get_semaphore(text_length)
+
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+            abort = threading.Event()
+
+            def _publish(item) -> bool:
+                """Timed put from the pump thread
+
+                Gives up once abort is set, so a client that disconnected
+                mid-stream (leaving the queue full and undrained) cannot
+                block the single inference thread forever.
+                """
+                while not abort.is_set():
+                    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+                    try:
+                        future.result(timeout=0.5)
+                        return True
+                    except concurrent.futures.TimeoutError:
+                        if not future.cancel():
+                            # The put landed between timeout and cancel
+                            return True
+                    except concurrent.futures.CancelledError:
+                        pass
+                return False
+
+            @torch.inference_mode()
+            def _pump():
+                # Accounted on the inference thread, like _sync_generate
+                self.concurrency.increment_task()
+                try:
+                    spk_cond, emo_cond = self._lookup_conditioning(
+                        prompt_path, emo_audio_path, emo_vector, use_emo_text
+                    )
+                    chunks = self.tts.infer(
+                        spk_audio_prompt=prompt_path,
+                        text=text,
+                        output_path=None,
+                        emo_audio_prompt=emo_audio_path,
+                        emo_alpha=emo_alpha,
+                        emo_vector=emo_vector,
+                        use_emo_text=use_emo_text,
+                        emo_text=emo_text,
+                        use_random=use_random,
+                        verbose=verbose,
+                        stream_return=True,
+                        spk_cond=spk_cond,
+                        emo_cond=emo_cond,
+                        **generation_kwargs
+                    )
+                    for chunk in chunks:
+                        if not _publish(chunk.type(torch.int16).numpy().tobytes()):
+                            # Client gone; stop decoding the rest
+                            chunks.close()
+                            break
+                    _publish(None)
+                except Exception as e:
+                    _publish(e)
+                finally:
+                    self.concurrency.decrement_task()
+
+            pump = loop.run_in_executor(self._infer_executor, _pump)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                # On disconnect Starlette closes this generator here.
+                # Tell the pump to stop, then drain anything it already
+                # queued so a pending put can finish, and join it.
+                abort.set()
+                while not queue.empty():
+                    queue.get_nowait()
+                await pump
+
+    def _lookup_conditioning(
+        self,
+        prompt_path: str,
+        emo_audio_path: Optional[str],
+        emo_vector: Optional[List[float]],
+        use_emo_text: bool
+    ) -> Tuple[Optional[Tuple], Optional[torch.Tensor]]:
+        """Fetch cached speaker/emotion conditioning for configured prompts"""
+        spk_cond = None
+        emo_cond = None
+        if self.config.cache.enable_prompt_cache:
+            if prompt_path in self._cacheable_paths:
+                spk_cond = self._get_spk_conditioning(prompt_path)
+            # Mirror infer()'s choice of emotion reference so the cached
+            # embedding matches what it would extract itself
+            emo_ref = None if (use_emo_text or emo_vector is not None) else emo_audio_path
+            if emo_ref is None:
+                emo_ref = prompt_path
+            if emo_ref in self._cacheable_paths:
+                emo_cond = self._get_emo_conditioning(emo_ref)
+        return spk_cond, emo_cond
+
+    @torch.inference_mode()
     def _sync_generate(
         self,
         text: str,
@@ -318,22 +652,57 @@ class IndexTTSAPIHandler:
         use_random: bool,
         verbose: bool,
         generation_kwargs: Dict[str, Any]
-    ) -> str:
-        """Synchronous generation function (runs in thread pool)"""
-        return self.tts.infer(
-            spk_audio_prompt=prompt_path,
-            text=text,
-            output_path=output_path,
-            emo_audio_prompt=emo_audio_path,
-            emo_alpha=emo_alpha,
-            emo_vector=emo_vector,
-            use_emo_text=use_emo_text,
-            emo_text=emo_text,
-            use_random=use_random,
-            verbose=verbose,
-            **generation_kwargs
-        )
-    
+    ) -> Any:
+        """Synchronous generation function (runs in thread pool)
+
+        With an output_path the synthesized WAV is written there and the
+        path returned. Without one the WAV is encoded in memory and the
+        bytes returned, skipping the disk round-trip.
+        """
+        # Counted here on the inference thread, not in the coroutine, so
+        # current_tasks reflects running GPU work rather than requests
+        # still queued behind the executor
+        self.concurrency.increment_task()
+        try:
+            spk_cond, emo_cond = self._lookup_conditioning(
+                prompt_path, emo_audio_path, emo_vector, use_emo_text
+            )
+
+            # All requests run on the same stream so they share one
+            # allocator pool (blocks freed by the last request are
+            # reused by the next)
+            stream_ctx = (torch.cuda.stream(self._stream)
+                          if self._stream is not None else contextlib.nullcontext())
+            with stream_ctx:
+                result = self.tts.infer(
+                    spk_audio_prompt=prompt_path,
+                    text=text,
+                    output_path=output_path,
+                    emo_audio_prompt=emo_audio_path,
+                    emo_alpha=emo_alpha,
+                    emo_vector=emo_vector,
+                    use_emo_text=use_emo_text,
+                    emo_text=emo_text,
+                    use_random=use_random,
+                    verbose=verbose,
+                    spk_cond=spk_cond,
+                    emo_cond=emo_cond,
+                    **generation_kwargs
+                )
+            if self._stream is not None:
+                self._stream.synchronize()
+
+            if output_path is None and result is not None:
+                # infer() returned (sample_rate, int16 ndarray of shape
+                # (samples, channels)); encode as WAV without touching disk
+                sr, wav_data = result
+                buf = io.BytesIO()
+                torchaudio.save(buf, torch.from_numpy(wav_data.T), sr, format="wav")
+                return buf.getvalue()
+            return result
+        finally:
+            self.concurrency.decrement_task()
+
     def get_health_status(self) -> Dict[str, Any]:
         """Get service health status"""
         model_ver = getattr(self.tts, 'model_version', '2.0')
@@ -353,31 +722,17 @@ class IndexTTSAPIHandler:
     
     def get_concurrency_stats(self) -> Dict[str, Any]:
         """Get concurrency statistics"""
-        return self.concurrency.get_stats()
+        stats = self.concurrency.get_stats()
+        stats["queued_inferences"] = self._infer_executor._work_queue.qsize()
+        return stats
+
+    def shutdown(self):
+        """Shut down the micro-batch workers and the inference executor"""
+        for worker in self._batch_workers.values():
+            worker.cancel()
+        self._infer_executor.shutdown(wait=False)
     
     def clear_cache(self):
         """Clear prompt cache"""
         self.prompt_cache.clear()
 
-
-def audio_to_base64(audio_path: str) -> str:
-    """Convert audio file to base64 string"""
-    with open(audio_path, 'rb') as f:
-        audio_bytes = f.read()
-    return base64.b64encode(audio_bytes).decode('utf-8')
-
-
-def save_uploaded_audio(audio_data: bytes, filename: str = None) -> str:
-    """Save uploaded audio to temporary file"""
-    import tempfile
-    if filename is None:
-        fd, temp_path = tempfile.mkstemp(suffix='.wav')
-        os.close(fd)
-    else:
-        temp_path = os.path.join(tempfile.gettempdir(), filename)
-    
-    with open(temp_path, 'wb') as f:
-        f.write(audio_data)
-    
-    return temp_path
-